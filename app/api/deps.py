@@ -25,3 +25,13 @@ def get_current_user(
             detail="User not found",
         )
     return user
+
+def require_roles(*roles: str):
+    def checker(current_user: User = Depends(get_current_user)) -> User:
+        if current_user.role not in roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+            )
+        return current_user
+    return checker
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.v1 import auth, users, dvi, mitra, opportunities
+from app.api.v1 import auth, users, dvi, mitra, opportunities, exports, health
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -8,3 +8,5 @@ api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(dvi.router, prefix="/dvi", tags=["dvi"])
 api_router.include_router(mitra.router, prefix="/mitra", tags=["mitra"])
 api_router.include_router(opportunities.router, prefix="/opportunities", tags=["opportunities"])
+api_router.include_router(exports.router, prefix="/exports", tags=["exports"])
+api_router.include_router(health.router, prefix="/health", tags=["health"])
@@ -7,35 +7,16 @@ from app.schemas.dvi import DVICalculationInput, DVIRecordOut
 from app.models.dvi import DVIRecord
 from app.models.user import User
 from app.core.logging import get_logger
+from app.services.dvi_scoring import RECORD_FAMILY, current_model
+from app.services.dvi_writer import WriteBehindFull, dvi_writer
 
 router = APIRouter()
 logger = get_logger("dvi")
 
-WEIGHTS = {
-    "finance_score": 0.25,
-    "logistics_score": 0.2,
-    "health_score": 0.2,
-    "education_score": 0.2,
-    "wellbeing_score": 0.15,
-}
-
-def compute_overall_and_level(data: DVICalculationInput) -> tuple[float, str]:
-    weighted_sum = (
-        data.finance_score * WEIGHTS["finance_score"]
-        + data.logistics_score * WEIGHTS["logistics_score"]
-        + data.health_score * WEIGHTS["health_score"]
-        + data.education_score * WEIGHTS["education_score"]
-        + data.wellbeing_score * WEIGHTS["wellbeing_score"]
-    )
-    overall = weighted_sum
-
-    if overall >= 80:
-        level = "High"
-    elif overall >= 50:
-        level = "Medium"
-    else:
-        level = "Low"
-    return overall, level
+def compute_overall_and_level(data: DVICalculationInput) -> tuple[float, str, str]:
+    model = current_model(RECORD_FAMILY)
+    overall = model.score(data.model_dump())
+    return overall, model.level(overall), model.version
 
 @router.post("/calculate", response_model=DVIRecordOut)
 def calculate_dvi(
@@ -43,9 +24,9 @@ def calculate_dvi(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    overall, level = compute_overall_and_level(payload)
+    overall, level, scoring_model = compute_overall_and_level(payload)
 
-    record = DVIRecord(
+    values = dict(
         user_id=current_user.id,
         finance_score=payload.finance_score,
         logistics_score=payload.logistics_score,
@@ -54,10 +35,28 @@ def calculate_dvi(
         wellbeing_score=payload.wellbeing_score,
         overall_score=overall,
         level=level,
+        scoring_model=scoring_model,
     )
 
+    if dvi_writer is not None:
+        # Write-behind: the row is inserted by the background flusher.
+        try:
+            row = dvi_writer.submit(values)
+            logger.info(f"DVI calculated for user {current_user.email}: {overall:.1f} ({level}) [queued]")
+            return row
+        except WriteBehindFull:
+            logger.warning("DVI write-behind queue full, writing synchronously")
+
+    record = DVIRecord(**values)
+
     db.add(record)
     db.commit()
     db.refresh(record)
     logger.info(f"DVI calculated for user {current_user.email}: {overall:.1f} ({level})")
     return record
+
+@router.get("/write-behind/stats")
+def write_behind_stats(current_user: User = Depends(get_current_user)):
+    if dvi_writer is None:
+        return {"enabled": False}
+    return dvi_writer.stats()
@@ -0,0 +1,80 @@
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import require_roles
+from app.models.user import User
+from app.core.logging import get_logger
+from app.services.export import FORMATS, dvi_records_query, pa, stream_export, users_query
+
+router = APIRouter()
+logger = get_logger("exports")
+
+ExportFormat = Literal["csv", "ndjson", "parquet"]
+
+def _scoped_cohort(current_user: User, cohort: Optional[str]) -> Optional[str]:
+    """Institution users may only export their own cohort; admins may export any."""
+    if current_user.role == "admin":
+        return cohort
+    if not current_user.cohort:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Institution account is not linked to a cohort",
+        )
+    if cohort and cohort != current_user.cohort:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Cannot export another institution's cohort",
+        )
+    return current_user.cohort
+
+def _export_response(stmt, name: str, fmt: str, gzip: bool) -> StreamingResponse:
+    if fmt == "parquet" and pa is None:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export requires pyarrow on the server",
+        )
+    filename = f"{name}.{fmt}" + (".gz" if gzip and fmt != "parquet" else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    media_type = FORMATS[fmt]
+    if gzip and fmt != "parquet":
+        media_type = "application/gzip"
+    return StreamingResponse(stream_export(stmt, fmt, gzip=gzip), media_type=media_type, headers=headers)
+
+@router.get("/dvi-records")
+def export_dvi_records(
+    format: ExportFormat = "csv",
+    role: Optional[str] = None,
+    cohort: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+    current_user: User = Depends(require_roles("admin", "institution")),
+):
+    cohort = _scoped_cohort(current_user, cohort)
+    logger.info(
+        f"DVI export by {current_user.email}: format={format}, role={role}, "
+        f"cohort={cohort}, start={start}, end={end}"
+    )
+    stmt = dvi_records_query(role=role, cohort=cohort, start=start, end=end)
+    return _export_response(stmt, "dvi_records", format, gzip)
+
+@router.get("/users")
+def export_users(
+    format: ExportFormat = "csv",
+    role: Optional[str] = None,
+    cohort: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    gzip: bool = False,
+    current_user: User = Depends(require_roles("admin", "institution")),
+):
+    cohort = _scoped_cohort(current_user, cohort)
+    logger.info(
+        f"User export by {current_user.email}: format={format}, role={role}, "
+        f"cohort={cohort}, start={start}, end={end}"
+    )
+    stmt = users_query(role=role, cohort=cohort, start=start, end=end)
+    return _export_response(stmt, "users", format, gzip)
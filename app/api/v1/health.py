@@ -0,0 +1,72 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.instrumentation import metrics, pool_status
+from app.db.session import engine
+from app.services.dvi_writer import dvi_writer
+
+router = APIRouter()
+logger = get_logger("health")
+settings = get_settings()
+
+_probe_engine = None
+
+def _get_probe_engine():
+    """
+    Engine used only by the probe. It opens a fresh connection each time
+    (NullPool) with short connect and statement timeouts, so the check answers
+    quickly instead of queueing behind a saturated application pool.
+    """
+    global _probe_engine
+    if _probe_engine is None:
+        connect_args = {}
+        if engine.dialect.name == "postgresql":
+            connect_args = {
+                "connect_timeout": settings.db_ready_timeout_s,
+                "options": f"-c statement_timeout={settings.db_ready_timeout_s * 1000}",
+            }
+        _probe_engine = create_engine(settings.database_url, poolclass=NullPool, connect_args=connect_args)
+    return _probe_engine
+
+@router.get("/ready")
+def readiness():
+    """
+    Readiness probe: checks the database round trip and reports pool
+    saturation, pre-ping and slow-query counters. Returns 503 when the
+    database cannot be reached.
+    """
+    db_status = {"ok": True}
+    start = time.perf_counter()
+    try:
+        with _get_probe_engine().connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.error(f"Readiness check failed: {e}")
+        db_status = {"ok": False, "error": str(e)}
+    db_status["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    pool = pool_status(engine)
+    body = {
+        "status": "ok" if db_status["ok"] else "unavailable",
+        "service": "vitaavanza-backend",
+        "database": db_status,
+        "pool": {
+            **pool,
+            "pre_ping": settings.db_pool_pre_ping,
+            "timeout_s": settings.db_pool_timeout,
+            **metrics.snapshot(),
+        },
+        "queries": {
+            "statement_timeout_ms": settings.db_statement_timeout_ms,
+            "slow_query_ms": settings.db_slow_query_ms,
+            "top_slow": metrics.top_slow_queries(),
+        },
+        "dvi_write_behind": dvi_writer.stats() if dvi_writer is not None else {"enabled": False},
+    }
+    return JSONResponse(status_code=200 if db_status["ok"] else 503, content=body)
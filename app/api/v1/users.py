@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, require_roles
 from app.db.session import get_db
-from app.schemas.user import UserOut
+from app.schemas.user import UserAdminUpdate, UserOut
 from app.models.user import User
+from app.core.logging import get_logger
 
 router = APIRouter()
+logger = get_logger("users")
 
 @router.get("/me", response_model=UserOut)
 def read_me(
@@ -14,3 +16,27 @@ def read_me(
     db: Session = Depends(get_db),
 ):
     return current_user
+
+@router.patch("/{user_id}", response_model=UserOut)
+def update_user(
+    user_id: int,
+    payload: UserAdminUpdate,
+    current_user: User = Depends(require_roles("admin")),
+    db: Session = Depends(get_db),
+):
+    """Admin-only: set a user's role, cohort or active flag. Send `cohort: null` to clear it."""
+    user = db.get(User, user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found",
+        )
+    changes = payload.model_dump(exclude_unset=True)
+    # Only cohort can be cleared; a null role or is_active is ignored.
+    changes = {k: v for k, v in changes.items() if v is not None or k == "cohort"}
+    for field, value in changes.items():
+        setattr(user, field, value)
+    db.commit()
+    db.refresh(user)
+    logger.info(f"User {user.email} updated by {current_user.email}: {changes}")
+    return user
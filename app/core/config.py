@@ -13,11 +13,39 @@ class Settings(BaseSettings):
     algorithm: str = "HS256"
 
     database_url: str = os.getenv("DATABASE_URL", "")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    db_pool_timeout: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "True") == "True"
+    db_statement_timeout_ms: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    db_slow_query_ms: int = int(os.getenv("DB_SLOW_QUERY_MS", "500"))
+    db_ready_timeout_s: int = int(os.getenv("DB_READY_TIMEOUT_S", "2"))
     allowed_origins: List[str] = os.getenv("ALLOWED_ORIGINS", "").split(",") if os.getenv("ALLOWED_ORIGINS") else ["*"]
 
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     openai_model: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
+    # Write-behind batching for DVI record inserts (PostgreSQL only)
+    dvi_write_behind: bool = os.getenv("DVI_WRITE_BEHIND", "False") == "True"
+    dvi_flush_batch_size: int = int(os.getenv("DVI_FLUSH_BATCH_SIZE", "200"))
+    dvi_flush_interval_ms: int = int(os.getenv("DVI_FLUSH_INTERVAL_MS", "500"))
+    dvi_max_pending: int = int(os.getenv("DVI_MAX_PENDING", "5000"))
+    dvi_id_block_size: int = int(os.getenv("DVI_ID_BLOCK_SIZE", "500"))
+    dvi_spill_path: str = os.getenv("DVI_SPILL_PATH", "dvi_write_behind.spill.jsonl")
+
+    # dvi_records partitioning, rollups and retention
+    dvi_partitions_ahead: int = int(os.getenv("DVI_PARTITIONS_AHEAD", "3"))
+    dvi_rollup_granularity: str = os.getenv("DVI_ROLLUP_GRANULARITY", "month")
+    dvi_rollup_after_days: int = int(os.getenv("DVI_ROLLUP_AFTER_DAYS", "90"))
+    dvi_raw_retention_days: int = int(os.getenv("DVI_RAW_RETENTION_DAYS", "0"))
+    dvi_recent_days: int = int(os.getenv("DVI_RECENT_DAYS", "180"))
+    # statement_timeout for maintenance transactions; 0 = none (overrides DB_STATEMENT_TIMEOUT_MS)
+    dvi_maintenance_statement_timeout_ms: int = int(os.getenv("DVI_MAINTENANCE_STATEMENT_TIMEOUT_MS", "0"))
+
+    # Institution exports
+    export_chunk_size: int = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
     class Config:
         case_sensitive = True
 
@@ -0,0 +1,218 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from app.core.logging import get_logger
+
+logger = get_logger("db")
+
+MAX_TRACKED_FINGERPRINTS = 200
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%\(\w+\)s|:\w+|%s)(?:::\w+)?"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+# Multi-row VALUES lists, e.g. from batched inserts: (?), (?), (?) -> (?)
+_REPEATED_GROUPS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalise a SQL statement so queries differing only in literals group together."""
+    s = _STRING_LITERAL.sub("?", statement)
+    s = _NUMBER.sub("?", s)
+    s = _PLACEHOLDER_LIST.sub("(?)", s)
+    s = _REPEATED_GROUPS.sub("(?)", s)
+    return _WHITESPACE.sub(" ", s).strip()
+
+
+def _fingerprint_id(normalised: str) -> str:
+    return hashlib.sha1(normalised.encode("utf-8")).hexdigest()[:12]
+
+
+class DBMetrics:
+    """Process-wide counters for pool checkout, pre-ping and slow statements."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_errors = 0
+        self.checkout_wait_total_ms = 0.0
+        self.checkout_wait_max_ms = 0.0
+        self.connects = 0
+        self.invalidations = 0
+        self.pre_pings = 0
+        self.pre_ping_failures = 0
+        self.pre_ping_total_ms = 0.0
+        self.slow_queries = 0
+        self._slow: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def incr(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_checkout(self, wait_ms: float, timed_out: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.checkout_timeouts += 1
+                return
+            if failed:
+                self.checkout_errors += 1
+                return
+            self.checkouts += 1
+            self.checkout_wait_total_ms += wait_ms
+            self.checkout_wait_max_ms = max(self.checkout_wait_max_ms, wait_ms)
+
+    def record_pre_ping(self, elapsed_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.pre_pings += 1
+            self.pre_ping_total_ms += elapsed_ms
+            if not ok:
+                self.pre_ping_failures += 1
+
+    def record_slow_query(self, statement: str, elapsed_ms: float) -> str:
+        normalised = fingerprint(statement)
+        fid = _fingerprint_id(normalised)
+        with self._lock:
+            self.slow_queries += 1
+            entry = self._slow.pop(fid, None) or {
+                "fingerprint": fid,
+                "statement": normalised[:500],
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+            }
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            self._slow[fid] = entry
+            while len(self._slow) > MAX_TRACKED_FINGERPRINTS:
+                self._slow.popitem(last=False)
+        return fid
+
+    def top_slow_queries(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = sorted(self._slow.values(), key=lambda e: e["total_ms"], reverse=True)[:limit]
+            return [
+                {**e, "total_ms": round(e["total_ms"], 1), "max_ms": round(e["max_ms"], 1)}
+                for e in entries
+            ]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg_wait = self.checkout_wait_total_ms / self.checkouts if self.checkouts else 0.0
+            avg_ping = self.pre_ping_total_ms / self.pre_pings if self.pre_pings else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_errors": self.checkout_errors,
+                "checkout_wait_avg_ms": round(avg_wait, 2),
+                "checkout_wait_max_ms": round(self.checkout_wait_max_ms, 2),
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "pre_pings": self.pre_pings,
+                "pre_ping_failures": self.pre_ping_failures,
+                "pre_ping_avg_ms": round(avg_ping, 2),
+                "slow_queries": self.slow_queries,
+            }
+
+
+metrics = DBMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long callers wait to get a connection.
+    Pool exhaustion (TimeoutError) and failures to open a connection (refused,
+    auth, DNS) are counted separately so an outage does not look like saturation.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            metrics.record_checkout((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        except Exception:
+            metrics.record_checkout((time.perf_counter() - start) * 1000, failed=True)
+            raise
+        metrics.record_checkout((time.perf_counter() - start) * 1000)
+        return conn
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    status: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    return status
+
+
+def instrument_engine(engine: Engine, slow_query_ms: int, statement_timeout_ms: int) -> None:
+    """Attach pool, pre-ping, statement-timeout and slow-query hooks to `engine`."""
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.incr("connects")
+        if statement_timeout_ms > 0 and engine.dialect.name == "postgresql":
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET statement_timeout = {int(statement_timeout_ms)}")
+            cursor.close()
+            # Keep the SET out of the first transaction's scope.
+            dbapi_connection.commit()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.incr("invalidations")
+        logger.warning(f"DB connection invalidated: {exception}")
+
+    # The start time lives on the execution context, which is discarded with
+    # the statement, so nothing needs cleaning up when a statement fails.
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._va_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_va_query_start", None)
+        if start is None:
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if slow_query_ms > 0 and elapsed_ms >= slow_query_ms:
+            fid = metrics.record_slow_query(statement, elapsed_ms)
+            logger.warning(f"Slow query [{fid}] {elapsed_ms:.0f}ms: {fingerprint(statement)[:300]}")
+
+    # Time pre-ping round trips by wrapping the dialect's ping on this engine only.
+    dialect = engine.dialect
+    do_ping = dialect.do_ping
+
+    def timed_ping(dbapi_connection):
+        start = time.perf_counter()
+        ok = False
+        try:
+            ok = do_ping(dbapi_connection)
+            return ok
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            metrics.record_pre_ping(elapsed_ms, bool(ok))
+            if not ok:
+                logger.warning(f"DB pre-ping failed after {elapsed_ms:.1f}ms")
+
+    dialect.do_ping = timed_ping
@@ -0,0 +1,253 @@
+"""
+Monthly range partitioning of dvi_records on PostgreSQL.
+
+The parent table is partitioned by RANGE (created_at) with one partition per
+calendar month (dvi_records_pYYYYMM) plus a DEFAULT partition that catches
+anything outside the pre-created range. PostgreSQL requires the partition key
+in the primary key, so the parent uses PRIMARY KEY (id, created_at); the ORM
+still identifies rows by id, which stays unique through its sequence.
+
+On other databases (SQLite in development) dvi_records is a plain table and
+the partition helpers are no-ops.
+"""
+import re
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import ForeignKeyConstraint, MetaData, Table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.models.dvi import DVIRecord, DVIRollup
+from app.models.user import User  # noqa: F401  (registers users for the foreign key)
+
+logger = get_logger("partitions")
+settings = get_settings()
+
+PARENT = DVIRecord.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+_PARTITION_NAME = re.compile(rf"^{PARENT}_p(\d{{4}})(\d{{2}})$")
+
+PARTITION_KEY = "created_at"
+
+
+def partitioned_parent() -> Table:
+    """
+    PostgreSQL definition of dvi_records, derived from the DVIRecord table so
+    the two cannot drift: the same columns and indexes, plus the partition key
+    in the primary key and PARTITION BY RANGE on it.
+    """
+    metadata = MetaData()
+    # Tables referenced by foreign keys must live in the same MetaData to compile.
+    for fk in DVIRecord.__table__.foreign_keys:
+        if fk.column.table.name not in metadata.tables:
+            fk.column.table.to_metadata(metadata)
+
+    columns = []
+    for column in DVIRecord.__table__.columns:
+        copy = column._copy()
+        if copy.name == PARTITION_KEY:
+            copy.primary_key = True
+            copy.nullable = False
+        elif copy.primary_key:
+            # Keep SERIAL now that the primary key is composite.
+            copy.autoincrement = True
+        columns.append(copy)
+    # Column._copy() does not carry ForeignKey objects, so rebuild the constraints.
+    foreign_keys = [
+        ForeignKeyConstraint(
+            fkc.column_keys,
+            [element.target_fullname for element in fkc.elements],
+            name=fkc.name,
+            ondelete=fkc.ondelete,
+            onupdate=fkc.onupdate,
+        )
+        for fkc in DVIRecord.__table__.foreign_key_constraints
+    ]
+    return Table(
+        PARENT, metadata, *columns, *foreign_keys,
+        postgresql_partition_by=f"RANGE ({PARTITION_KEY})",
+    )
+
+
+def month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(dt: datetime, months: int) -> datetime:
+    index = dt.year * 12 + dt.month - 1 + months
+    return dt.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARENT}_p{month.year:04d}{month.month:02d}"
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def set_maintenance_timeout(conn: Connection) -> None:
+    """
+    Replace the pool-wide statement_timeout for the current transaction only.
+    Bulk moves, rollups and DETACH/ATTACH lock waits can legitimately outlast
+    the timeout meant for request traffic.
+    """
+    if _is_postgres(conn):
+        timeout = int(settings.dvi_maintenance_statement_timeout_ms)
+        conn.execute(text(f"SET LOCAL statement_timeout = {timeout}"))
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if not _is_postgres(conn):
+        return False
+    return bool(conn.scalar(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+        ),
+        {"name": PARENT},
+    ))
+
+
+def create_dvi_tables(engine: Engine, months_ahead: Optional[int] = None) -> None:
+    """
+    Create dvi_records (partitioned on PostgreSQL) and dvi_rollups if missing,
+    along with partitions for the current and next `months_ahead` months so
+    new rows do not land in DEFAULT before the maintenance job first runs.
+    An existing unpartitioned dvi_records is left as it is.
+    """
+    with engine.begin() as conn:
+        if _is_postgres(conn):
+            conn.execute(CreateTable(partitioned_parent(), if_not_exists=True))
+            if is_partitioned(conn):
+                for index in DVIRecord.__table__.indexes:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+                conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"
+                ))
+            else:
+                logger.warning(f"{PARENT} exists as a plain table; partitioning is disabled.")
+        else:
+            DVIRecord.__table__.create(conn, checkfirst=True)
+        DVIRollup.__table__.create(conn, checkfirst=True)
+    ensure_partitions(
+        engine, settings.dvi_partitions_ahead if months_ahead is None else months_ahead
+    )
+
+
+def list_partitions(conn: Connection) -> List[Tuple[str, datetime]]:
+    """Monthly partitions as (name, month start), oldest first. Excludes DEFAULT."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name AND pg_table_is_visible(p.oid)"
+        ),
+        {"name": PARENT},
+    )
+    partitions = []
+    for (name,) in rows:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+            partitions.append((name, month))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def _default_partition_months(conn: Connection) -> Set[datetime]:
+    """Months (UTC) that have rows sitting in the DEFAULT partition."""
+    rows = conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') "
+        f"FROM {DEFAULT_PARTITION}"
+    ))
+    return {month.replace(tzinfo=timezone.utc) for (month,) in rows}
+
+
+def _create_partitions(conn: Connection, months: Iterable[datetime]) -> List[str]:
+    """
+    Create the monthly partitions for `months` that do not exist yet.
+
+    PostgreSQL refuses to create a partition whose range already has rows in
+    DEFAULT, so those rows are moved: DEFAULT is detached, the new partitions
+    are created and filled from it, and DEFAULT is attached again. All of it
+    happens in the caller's transaction.
+    """
+    existing = {name for name, _ in list_partitions(conn)}
+    missing = sorted({m for m in months if partition_name(m) not in existing})
+    if not missing:
+        return []
+
+    in_default = _default_partition_months(conn) & set(missing)
+    if in_default:
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {DEFAULT_PARTITION}"))
+
+    columns = ", ".join(c.name for c in DVIRecord.__table__.columns)
+    for lower in missing:
+        name = partition_name(lower)
+        upper = add_months(lower, 1)
+        bounds = {"lower": lower, "upper": upper}
+        conn.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {PARENT} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        if lower in in_default:
+            moved = conn.execute(
+                text(
+                    f"INSERT INTO {name} ({columns}) SELECT {columns} FROM {DEFAULT_PARTITION} "
+                    "WHERE created_at >= :lower AND created_at < :upper"
+                ),
+                bounds,
+            ).rowcount
+            conn.execute(
+                text(f"DELETE FROM {DEFAULT_PARTITION} WHERE created_at >= :lower AND created_at < :upper"),
+                bounds,
+            )
+            logger.info(f"Moved {moved} rows from {DEFAULT_PARTITION} into {name}")
+
+    if in_default:
+        conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    return [partition_name(m) for m in missing]
+
+
+def ensure_partitions(engine: Engine, months_ahead: int = 3, now: Optional[datetime] = None) -> List[str]:
+    """
+    Create monthly partitions from the current month to `months_ahead` months
+    out, plus one for every month that has rows stranded in DEFAULT (e.g.
+    after the maintenance job has not run for a while).
+    """
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return []
+        set_maintenance_timeout(conn)
+        current = month_start(now or datetime.now(timezone.utc))
+        months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        months |= _default_partition_months(conn)
+        created = _create_partitions(conn, months)
+    if created:
+        logger.info(f"Created {PARENT} partitions: {', '.join(created)}")
+    return created
+
+
+def drop_partitions_before(engine: Engine, cutoff: datetime) -> List[str]:
+    """
+    Drop monthly partitions that lie entirely before `cutoff`. Returns the
+    dropped names; rows in the DEFAULT partition are not touched here.
+    """
+    dropped: List[str] = []
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            return dropped
+        set_maintenance_timeout(conn)
+        for name, month in list_partitions(conn):
+            if add_months(month, 1) <= cutoff:
+                conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+                dropped.append(name)
+    if dropped:
+        logger.info(f"Dropped {PARENT} partitions: {', '.join(dropped)}")
+    return dropped
@@ -2,6 +2,7 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.core.config import get_settings
 from app.core.logging import get_logger
+from app.db.instrumentation import InstrumentedQueuePool, instrument_engine
 
 logger = get_logger("db")
 settings = get_settings()
@@ -11,9 +12,17 @@ if not settings.database_url:
 
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    poolclass=InstrumentedQueuePool,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+)
+instrument_engine(
+    engine,
+    slow_query_ms=settings.db_slow_query_ms,
+    statement_timeout_ms=settings.db_statement_timeout_ms,
 )
 
 class Base(DeclarativeBase):
@@ -1,15 +1,24 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 import os
 
+from app.services.dvi_scoring import PILOT_FAMILY, current_model
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
 except ImportError:
     pass
 
+# Imported after load_dotenv so Settings sees the .env values.
+from app.api.v1 import api_router  # noqa: E402
+from app.services.dvi_writer import dvi_writer  # noqa: E402
+
 try:
     from openai import OpenAI
 except ImportError:
@@ -18,10 +27,23 @@ except ImportError:
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 openai_client = OpenAI(api_key=OPENAI_API_KEY) if (OpenAI and OPENAI_API_KEY) else None
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the flusher now so rows spilled by the previous run are replayed.
+    if dvi_writer is not None:
+        dvi_writer.start()
+    yield
+    # Write any DVI records still queued by the write-behind flusher.
+    if dvi_writer is not None:
+        await run_in_threadpool(dvi_writer.shutdown)
+
+
 app = FastAPI(
     title="VitaAvanza Backend",
     version="0.2.0",
     description="API for DVI and Mitra (VitaAvanza pilot)",
+    lifespan=lifespan,
 )
 
 # CORS – allow frontend
@@ -33,6 +55,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.include_router(api_router, prefix="/api/v1")
+
 
 # ---------- MODELS ----------
 
@@ -57,6 +81,7 @@ class DVIResponse(BaseModel):
     overall: float
     breakdown: DVIBreakdown
     commentary: str
+    scoring_model: str
 
 
 class ChatMessage(BaseModel):
@@ -142,22 +167,21 @@ def health_check():
 def compute_dvi(payload: DVIRequest):
     """
     DVI = [Stability, Growth, Wellbeing Load, Social Support] → 0–100 index.
-    Weights inspired by your spec.
+    Weights come from the current pilot model in the scoring registry.
     """
     stability = clamp(payload.stability)
     growth = clamp(payload.growth)
     wellbeing_load = clamp(payload.wellbeing_load)
     social_support = clamp(payload.social_support)
 
-    # Higher wellbeing_load means more pressure, so we invert it for the total score
-    normalized_wellbeing = 100 - wellbeing_load
-
-    overall = (
-        0.30 * stability +
-        0.30 * growth +
-        0.25 * normalized_wellbeing +
-        0.15 * social_support
-    )
+    # The pilot model inverts wellbeing_load: more pressure lowers the total score
+    model = current_model(PILOT_FAMILY)
+    overall = model.score({
+        "stability": stability,
+        "growth": growth,
+        "wellbeing_load": wellbeing_load,
+        "social_support": social_support,
+    })
 
     if overall >= 80:
         commentary = "You are in a strong development zone. Let’s keep reinforcing what already works."
@@ -177,6 +201,7 @@ def compute_dvi(payload: DVIRequest):
             social_support=social_support,
         ),
         commentary=commentary,
+        scoring_model=model.version,
     )
 
 
@@ -1,9 +1,19 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, String, Index, UniqueConstraint
 from sqlalchemy.sql import func
 from app.db.session import Base
 
 class DVIRecord(Base):
+    """
+    Raw DVI calculations. On PostgreSQL the table is range-partitioned by
+    month on created_at (see app/db/partitions.py); filter on created_at
+    whenever possible so only the relevant partitions are scanned.
+    """
     __tablename__ = "dvi_records"
+    __table_args__ = (
+        Index("ix_dvi_records_user_created", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -16,5 +26,47 @@ class DVIRecord(Base):
 
     overall_score = Column(Float, nullable=False)
     level = Column(String, nullable=False)
+    scoring_model = Column(String, nullable=True, index=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @classmethod
+    def created_within(cls, days: int):
+        """Filter criterion limiting a query to the last `days` days."""
+        return cls.created_at >= datetime.now(timezone.utc) - timedelta(days=days)
+
+# Rollup key for raw records scored before scoring_model was recorded.
+UNVERSIONED_MODEL = "unversioned"
+
+class DVIRollup(Base):
+    """
+    Per-user daily or monthly aggregate of DVIRecord rows, one per scoring
+    model present in the period.
+    """
+    __tablename__ = "dvi_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "granularity", "period_start", "scoring_model",
+            name="uq_dvi_rollups_user_period_model",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    granularity = Column(String, nullable=False)  # day, month
+    period_start = Column(DateTime(timezone=True), nullable=False)
+    # Not nullable so the unique constraint (and ON CONFLICT) matches; see UNVERSIONED_MODEL.
+    scoring_model = Column(String, nullable=False)
+
+    record_count = Column(Integer, nullable=False)
+    avg_finance_score = Column(Float, nullable=False)
+    avg_logistics_score = Column(Float, nullable=False)
+    avg_health_score = Column(Float, nullable=False)
+    avg_education_score = Column(Float, nullable=False)
+    avg_wellbeing_score = Column(Float, nullable=False)
+    avg_overall_score = Column(Float, nullable=False)
+    min_overall_score = Column(Float, nullable=False)
+    max_overall_score = Column(Float, nullable=False)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    first_record_at = Column(DateTime(timezone=True), nullable=False)
+    last_record_at = Column(DateTime(timezone=True), nullable=False)
@@ -18,6 +18,7 @@ class DVIRecordOut(BaseModel):
     wellbeing_score: float
     overall_score: float
     level: str
+    scoring_model: Optional[str] = None
 
     class Config:
         from_attributes = True
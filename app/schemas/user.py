@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Literal, Optional
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -12,9 +12,15 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+class UserAdminUpdate(BaseModel):
+    role: Optional[Literal["user", "admin", "institution"]] = None
+    cohort: Optional[str] = None
+    is_active: Optional[bool] = None
+
 class UserOut(UserBase):
     id: int
     role: str
+    cohort: Optional[str] = None
     is_active: bool
 
     class Config:
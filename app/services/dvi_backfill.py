@@ -0,0 +1,151 @@
+"""
+Recompute stored DVI scores with a scoring model from the registry.
+
+    python -m app.services.dvi_backfill --model record-v1 --chunk-size 2000
+
+The table is read once through a server-side cursor ordered by id, so memory
+stays flat regardless of table size. Each chunk is scored in one vectorized
+pass and written back in its own transaction; the last committed id is
+written to the checkpoint file, together with the model version, so an
+interrupted run resumes where it stopped. A checkpoint saved for a different
+model is ignored. Records already on the target model are skipped. Rollups
+covering the rescored records are rebuilt at the end (see dvi_retention).
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func, or_, select, update
+
+from app.core.logging import get_logger
+from app.db.session import SessionLocal
+from app.models.dvi import DVIRecord
+from app.models.user import User  # noqa: F401  (registers users for the foreign key)
+from app.services.dvi_retention import reroll_dvi_records
+from app.services.dvi_scoring import RECORD_FAMILY, ScoringModel, current_model, get_model
+
+logger = get_logger("dvi_backfill")
+
+
+def _read_checkpoint(path: Optional[str], version: str) -> Tuple[int, Optional[datetime]]:
+    """
+    Last committed id and earliest rescored created_at for `version`, or
+    (0, None) if there is no usable checkpoint.
+    """
+    if not path or not os.path.exists(path):
+        return 0, None
+    with open(path) as f:
+        try:
+            checkpoint = json.load(f)
+        except ValueError:
+            logger.warning(f"Ignoring unreadable backfill checkpoint {path}")
+            return 0, None
+    if checkpoint.get("version") != version:
+        logger.warning(
+            f"Ignoring backfill checkpoint {path}: it was saved for "
+            f"{checkpoint.get('version')!r}, this run targets {version!r}"
+        )
+        return 0, None
+    earliest = checkpoint.get("earliest")
+    return int(checkpoint.get("last_id", 0)), datetime.fromisoformat(earliest) if earliest else None
+
+
+def _write_checkpoint(
+    path: Optional[str], version: str, last_id: int, earliest: Optional[datetime]
+) -> None:
+    if not path:
+        return
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({
+            "version": version,
+            "last_id": last_id,
+            "earliest": earliest.isoformat() if earliest else None,
+        }, f)
+    os.replace(tmp, path)
+
+
+def recompute_dvi_records(
+    model: ScoringModel,
+    chunk_size: int = 2000,
+    after_id: int = 0,
+    checkpoint_path: Optional[str] = None,
+) -> int:
+    """Rescore every record with id > `after_id` not yet on `model`. Returns rows updated."""
+    resume_id, earliest = _read_checkpoint(checkpoint_path, model.version)
+    after_id = max(after_id, resume_id)
+    stale = or_(DVIRecord.scoring_model.is_(None), DVIRecord.scoring_model != model.version)
+    pillar_columns = [getattr(DVIRecord, p) for p in model.pillars]
+
+    with SessionLocal() as reader, SessionLocal() as writer:
+        total = reader.scalar(
+            select(func.count()).select_from(DVIRecord).where(DVIRecord.id > after_id, stale)
+        )
+        logger.info(f"Backfill to {model.version}: {total} records after id {after_id}")
+
+        stmt = (
+            select(DVIRecord.id, DVIRecord.created_at, *pillar_columns)
+            .where(DVIRecord.id > after_id, stale)
+            .order_by(DVIRecord.id)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        done = 0
+        started = time.perf_counter()
+        for chunk in reader.execute(stmt).partitions():
+            ids = [row[0] for row in chunk]
+            chunk_earliest = min(row[1] for row in chunk)
+            earliest = chunk_earliest if earliest is None else min(earliest, chunk_earliest)
+            columns = {p: [row[i + 2] for row in chunk] for i, p in enumerate(model.pillars)}
+            scores = model.score_many(columns)
+
+            writer.execute(
+                update(DVIRecord),
+                [
+                    {
+                        "id": record_id,
+                        "overall_score": overall,
+                        "level": model.level(overall),
+                        "scoring_model": model.version,
+                    }
+                    for record_id, overall in zip(ids, scores)
+                ],
+            )
+            writer.commit()
+            _write_checkpoint(checkpoint_path, model.version, ids[-1], earliest)
+
+            done += len(ids)
+            rate = done / max(time.perf_counter() - started, 1e-9)
+            logger.info(
+                f"Backfill progress: {done}/{total} ({done / max(total, 1):.1%}), "
+                f"last id {ids[-1]}, {rate:.0f} rows/s"
+            )
+
+    logger.info(f"Backfill to {model.version} finished: {done} records updated")
+    if earliest is not None:
+        reroll_dvi_records(earliest)
+    return done
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute stored DVI scores.")
+    parser.add_argument("--model", help="Scoring model version (default: current record model)")
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    parser.add_argument("--after-id", type=int, default=0, help="Only process records with a larger id")
+    parser.add_argument("--checkpoint", help="File used to persist and resume progress")
+    args = parser.parse_args()
+
+    model = get_model(args.model) if args.model else current_model(RECORD_FAMILY)
+    recompute_dvi_records(
+        model,
+        chunk_size=args.chunk_size,
+        after_id=args.after_id,
+        checkpoint_path=args.checkpoint,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Partition maintenance, rollups and retention for dvi_records.
+
+    python -m app.services.dvi_retention
+
+One run:
+1. creates monthly partitions ahead of time (PostgreSQL),
+2. compacts raw records older than DVI_ROLLUP_AFTER_DAYS into per-user
+   daily or monthly rows in dvi_rollups,
+3. if DVI_RAW_RETENTION_DAYS > 0, removes raw records older than that —
+   by dropping whole partitions where possible, otherwise with batched deletes.
+
+Cutoffs are aligned to period boundaries so a rolled-up period always has all
+of its raw rows when it is (re)aggregated, which makes every step idempotent.
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.partitions import (
+    add_months,
+    drop_partitions_before,
+    ensure_partitions,
+    month_start,
+    set_maintenance_timeout,
+)
+from app.db.session import SessionLocal, engine
+from app.models.dvi import UNVERSIONED_MODEL, DVIRecord, DVIRollup
+
+settings = get_settings()
+logger = get_logger("dvi_retention")
+
+GRANULARITIES = ("day", "month")
+DELETE_BATCH_SIZE = 10000
+
+
+def period_start(dt: datetime, granularity: str) -> datetime:
+    if granularity == "month":
+        return month_start(dt)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(dt: datetime, granularity: str) -> datetime:
+    return add_months(dt, 1) if granularity == "month" else dt + timedelta(days=1)
+
+
+def _period_expr(granularity: str):
+    if engine.dialect.name == "postgresql":
+        # Truncate in UTC so periods do not depend on the session time zone.
+        return func.timezone(
+            "UTC", func.date_trunc(granularity, func.timezone("UTC", DVIRecord.created_at))
+        )
+    # Same text layout SQLAlchemy uses for DateTime on SQLite, so comparisons line up.
+    fmt = "%Y-%m-01 00:00:00.000000" if granularity == "month" else "%Y-%m-%d 00:00:00.000000"
+    return func.strftime(fmt, DVIRecord.created_at)
+
+
+def _insert(table):
+    return pg_insert(table) if engine.dialect.name == "postgresql" else sqlite_insert(table)
+
+
+ROLLUP_COLUMNS = [
+    "user_id", "granularity", "period_start", "scoring_model", "record_count",
+    "avg_finance_score", "avg_logistics_score", "avg_health_score",
+    "avg_education_score", "avg_wellbeing_score", "avg_overall_score",
+    "min_overall_score", "max_overall_score", "first_record_at", "last_record_at",
+]
+
+
+def _aggregate(db, granularity: str, start: Optional[datetime], before: datetime) -> int:
+    """Upsert rollups for raw records in [start, before). Returns the rows upserted."""
+    period = _period_expr(granularity).label("period_start")
+    model = func.coalesce(DVIRecord.scoring_model, UNVERSIONED_MODEL).label("scoring_model")
+    source = (
+        select(
+            DVIRecord.user_id,
+            literal(granularity, DVIRollup.granularity.type).label("granularity"),
+            period,
+            model,
+            func.count().label("record_count"),
+            func.avg(DVIRecord.finance_score),
+            func.avg(DVIRecord.logistics_score),
+            func.avg(DVIRecord.health_score),
+            func.avg(DVIRecord.education_score),
+            func.avg(DVIRecord.wellbeing_score),
+            func.avg(DVIRecord.overall_score),
+            func.min(DVIRecord.overall_score),
+            func.max(DVIRecord.overall_score),
+            func.min(DVIRecord.created_at),
+            func.max(DVIRecord.created_at),
+        )
+        .where(DVIRecord.created_at < before)
+        .group_by(DVIRecord.user_id, period, model)
+    )
+    if start is not None:
+        source = source.where(DVIRecord.created_at >= start)
+
+    stmt = _insert(DVIRollup).from_select(ROLLUP_COLUMNS, source)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "granularity", "period_start", "scoring_model"],
+        set_={c: stmt.excluded[c] for c in ROLLUP_COLUMNS[4:]},
+    )
+    return db.execute(stmt).rowcount or 0
+
+
+def rollup_dvi_records(granularity: str, before: datetime) -> int:
+    """
+    Aggregate raw records created before `before` into dvi_rollups, starting
+    from the latest period already rolled up. Returns the rows upserted.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown rollup granularity: {granularity}")
+
+    with SessionLocal() as db:
+        set_maintenance_timeout(db.connection())
+        since = db.scalar(
+            select(func.max(DVIRollup.period_start)).where(DVIRollup.granularity == granularity)
+        )
+        # Re-aggregate the latest rolled-up period in case it was partial.
+        count = _aggregate(db, granularity, since, before)
+        db.commit()
+
+    logger.info(f"Rolled up {count} {granularity} periods of dvi_records before {before.isoformat()}")
+    return count
+
+
+def reroll_dvi_records(since: datetime) -> int:
+    """
+    Rebuild existing rollups from the period containing `since` onwards, e.g.
+    after raw records were rescored with a new scoring model. Rollups whose raw
+    records have already been purged cannot be rebuilt and keep the model they
+    were built with. Returns the rows upserted.
+    """
+    count = 0
+    with SessionLocal() as db:
+        set_maintenance_timeout(db.connection())
+        horizons = db.execute(
+            select(DVIRollup.granularity, func.max(DVIRollup.period_start))
+            .group_by(DVIRollup.granularity)
+        ).all()
+        for granularity, latest in horizons:
+            start = period_start(since, granularity)
+            before = next_period(latest, granularity)
+            if start >= before:
+                continue
+            # Rows keyed on the old model would otherwise be counted twice.
+            db.execute(
+                delete(DVIRollup).where(
+                    DVIRollup.granularity == granularity,
+                    DVIRollup.period_start >= start,
+                )
+            )
+            count += _aggregate(db, granularity, start, before)
+        db.commit()
+
+    logger.info(f"Re-rolled {count} dvi_rollups rows from {since.isoformat()}")
+    return count
+
+
+def purge_dvi_records(before: datetime) -> int:
+    """
+    Remove raw records created before `before`. Whole monthly partitions are
+    dropped; anything left (plain tables, the DEFAULT partition) is deleted in
+    batches to keep transactions short. Returns rows deleted by batches.
+    """
+    drop_partitions_before(engine, before)
+
+    deleted = 0
+    with SessionLocal() as db:
+        while True:
+            # SET LOCAL ends with each commit, so apply it per batch.
+            set_maintenance_timeout(db.connection())
+            batch = (
+                select(DVIRecord.id)
+                .where(DVIRecord.created_at < before)
+                .limit(DELETE_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            result = db.execute(
+                delete(DVIRecord)
+                .where(DVIRecord.id.in_(batch), DVIRecord.created_at < before)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            deleted += result.rowcount or 0
+            if not result.rowcount or result.rowcount < DELETE_BATCH_SIZE:
+                break
+
+    if deleted:
+        logger.info(f"Deleted {deleted} dvi_records older than {before.isoformat()}")
+    return deleted
+
+
+def run_maintenance(
+    granularity: Optional[str] = None,
+    rollup_after_days: Optional[int] = None,
+    retention_days: Optional[int] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, object]:
+    granularity = granularity or settings.dvi_rollup_granularity
+    rollup_after_days = settings.dvi_rollup_after_days if rollup_after_days is None else rollup_after_days
+    retention_days = settings.dvi_raw_retention_days if retention_days is None else retention_days
+    now = now or datetime.now(timezone.utc)
+
+    if retention_days and retention_days < rollup_after_days:
+        raise ValueError(
+            "DVI_RAW_RETENTION_DAYS must be 0 or at least DVI_ROLLUP_AFTER_DAYS, "
+            "otherwise raw records would be deleted before they are rolled up."
+        )
+
+    summary: Dict[str, object] = {}
+    summary["partitions_created"] = ensure_partitions(engine, settings.dvi_partitions_ahead, now=now)
+
+    rollup_before = period_start(now - timedelta(days=rollup_after_days), granularity)
+    summary["rollups_upserted"] = rollup_dvi_records(granularity, rollup_before)
+
+    if retention_days:
+        # Monthly alignment matches the partition bounds and is always a
+        # period boundary for both granularities.
+        purge_before = month_start(now - timedelta(days=retention_days))
+        purge_before = min(purge_before, month_start(rollup_before))
+        summary["raw_deleted"] = purge_dvi_records(purge_before)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="dvi_records partitions, rollups and retention.")
+    parser.add_argument("--granularity", choices=GRANULARITIES)
+    parser.add_argument("--rollup-after-days", type=int)
+    parser.add_argument("--retention-days", type=int)
+    args = parser.parse_args()
+
+    summary = run_maintenance(
+        granularity=args.granularity,
+        rollup_after_days=args.rollup_after_days,
+        retention_days=args.retention_days,
+    )
+    logger.info(f"dvi_records maintenance finished: {summary}")
+
+
+if __name__ == "__main__":
+    main()
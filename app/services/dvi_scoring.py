@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Mapping, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+@dataclass(frozen=True)
+class ScoringModel:
+    """
+    A versioned set of DVI weights.
+
+    Pillars listed in `inverted` are pressure measures (higher is worse) and
+    are scored as `100 - value`. `levels` maps a minimum overall score to a
+    level name, checked from the highest threshold down.
+    """
+    version: str
+    weights: Dict[str, float]
+    inverted: FrozenSet[str] = frozenset()
+    levels: Tuple[Tuple[float, str], ...] = ((80, "High"), (50, "Medium"), (0, "Low"))
+    description: str = ""
+    pillars: Tuple[str, ...] = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "pillars", tuple(self.weights))
+
+    def score(self, values: Mapping[str, float]) -> float:
+        total = 0.0
+        for pillar, weight in self.weights.items():
+            value = values[pillar]
+            if pillar in self.inverted:
+                value = 100 - value
+            total += weight * value
+        return total
+
+    def level(self, overall: float) -> str:
+        for threshold, name in self.levels:
+            if overall >= threshold:
+                return name
+        return self.levels[-1][1]
+
+    def score_many(self, columns: Mapping[str, Sequence[float]]) -> List[float]:
+        """Score a chunk of records given one sequence per pillar."""
+        if np is not None:
+            matrix = np.column_stack([
+                100 - np.asarray(columns[p], dtype=float) if p in self.inverted
+                else np.asarray(columns[p], dtype=float)
+                for p in self.pillars
+            ])
+            weights = np.array([self.weights[p] for p in self.pillars])
+            return (matrix @ weights).tolist()
+
+        n = len(columns[self.pillars[0]])
+        return [self.score({p: columns[p][i] for p in self.pillars}) for i in range(n)]
+
+
+# Five-pillar model stored in dvi_records (/api/v1/dvi).
+RECORD_FAMILY = "record"
+# Four-pillar pilot model (/api/dvi/score).
+PILOT_FAMILY = "pilot"
+
+_REGISTRY: Dict[str, ScoringModel] = {}
+_CURRENT: Dict[str, str] = {}
+
+
+def register(model: ScoringModel, family: str, current: bool = False) -> ScoringModel:
+    if model.version in _REGISTRY:
+        raise ValueError(f"Scoring model {model.version} is already registered")
+    _REGISTRY[model.version] = model
+    if current:
+        _CURRENT[family] = model.version
+    return model
+
+
+def get_model(version: str) -> ScoringModel:
+    try:
+        return _REGISTRY[version]
+    except KeyError:
+        raise KeyError(f"Unknown DVI scoring model: {version}") from None
+
+
+def current_model(family: str) -> ScoringModel:
+    return _REGISTRY[_CURRENT[family]]
+
+
+def list_models() -> List[ScoringModel]:
+    return list(_REGISTRY.values())
+
+
+# ---------- REGISTERED MODELS ----------
+# Never edit a registered model in place: add a new version and mark it
+# current, then run the backfill job to recompute stored records.
+
+register(
+    ScoringModel(
+        version="record-v1",
+        weights={
+            "finance_score": 0.25,
+            "logistics_score": 0.2,
+            "health_score": 0.2,
+            "education_score": 0.2,
+            "wellbeing_score": 0.15,
+        },
+        description="Weighted DVI over finance, logistics, health, education, wellbeing.",
+    ),
+    RECORD_FAMILY,
+    current=True,
+)
+
+register(
+    ScoringModel(
+        version="pilot-v1",
+        weights={
+            "stability": 0.30,
+            "growth": 0.30,
+            "wellbeing_load": 0.25,
+            "social_support": 0.15,
+        },
+        inverted=frozenset({"wellbeing_load"}),
+        description="Pilot DVI over stability, growth, wellbeing load, social support.",
+    ),
+    PILOT_FAMILY,
+    current=True,
+)
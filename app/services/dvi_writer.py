@@ -0,0 +1,365 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.session import SessionLocal, engine
+from app.models.dvi import DVIRecord
+
+settings = get_settings()
+logger = get_logger("dvi_writer")
+
+# Sequence created by PostgreSQL for the SERIAL primary key of dvi_records.
+ID_SEQUENCE = "dvi_records_id_seq"
+
+# Rows that could not be inserted are kept here (and logged) for inspection.
+DEAD_LETTER_LIMIT = 1000
+SHUTDOWN_FLUSH_ATTEMPTS = 3
+
+
+class WriteBehindFull(Exception):
+    """Raised by `submit` when `max_pending` rows are already queued or in flight."""
+
+
+class DVIWriteBehind:
+    """
+    Buffers DVIRecord rows in memory and writes them with multi-row inserts.
+
+    IDs are pre-allocated in blocks from the table's sequence, so a caller can
+    return the full record straight away while the insert happens later on the
+    flusher thread. A flush runs when `batch_size` rows are pending or every
+    `flush_interval` seconds, whichever comes first.
+
+    At most `max_pending` rows are held (queued plus in flight); beyond that
+    `submit` raises WriteBehindFull and the caller should write synchronously.
+    A batch rejected by a constraint or data error is retried row by row and
+    the offending rows are dead-lettered; other failures (e.g. the database
+    being unreachable) put the batch back for the next flush.
+
+    Rows that still cannot be written at shutdown are appended to the JSONL
+    file at `spill_path` and queued again by the next `start()`.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_pending: int = 5000,
+        id_block_size: int = 500,
+        spill_path: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.id_block_size = id_block_size
+        self.spill_path = spill_path
+
+        self._pending: List[Dict[str, Any]] = []
+        self._in_flight = 0
+        # Slots claimed by submit() calls that are still allocating an id.
+        self._reserved = 0
+        self._dead_letters: Deque[Dict[str, Any]] = deque(maxlen=DEAD_LETTER_LIMIT)
+        self._ids: Deque[int] = deque()
+        self._lock = threading.Lock()
+        self._id_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._atexit_registered = False
+
+        self._flushed_rows = 0
+        self._flush_count = 0
+        self._failed_flushes = 0
+        self._rejected_submits = 0
+        self._dropped_rows = 0
+        self._spilled_rows = 0
+        self._replayed_rows = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # ---------- lifecycle ----------
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._replay_spill()
+        self._thread = threading.Thread(target=self._run, name="dvi-write-behind", daemon=True)
+        self._thread.start()
+        if not self._atexit_registered:
+            # Fallback for processes that exit without running the app's lifespan.
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+        logger.info(
+            f"DVI write-behind started (batch={self.batch_size}, interval={self.flush_interval}s)"
+        )
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stop the flusher and write everything still pending. Safe to call twice."""
+        if self._thread is None and not self.queue_depth():
+            return
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        # Drain whatever arrived after the last loop iteration.
+        attempts = 0
+        while self.queue_depth():
+            if self.flush():
+                continue
+            attempts += 1
+            if attempts >= SHUTDOWN_FLUSH_ATTEMPTS:
+                with self._lock:
+                    lost, self._pending = self._pending, []
+                self._spill(lost)
+                break
+            time.sleep(0.5 * attempts)
+        logger.info("DVI write-behind stopped")
+
+    def _spill(self, rows: List[Dict[str, Any]]) -> None:
+        """Append `rows` to the spill file; dead-letter them if that is not possible."""
+        if not self.spill_path:
+            self._dead_letter(rows, "unflushed at shutdown")
+            return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"DVI write-behind could not spill to {self.spill_path}: {e}")
+            self._dead_letter(rows, "unflushed at shutdown")
+            return
+        self._spilled_rows += len(rows)
+        logger.warning(f"DVI write-behind spilled {len(rows)} unflushed rows to {self.spill_path}")
+
+    def _replay_spill(self) -> None:
+        """Queue rows spilled by an earlier process ahead of new submissions."""
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return
+        # Claim the file first so that, with several workers, only one replays it.
+        claimed = f"{self.spill_path}.{os.getpid()}"
+        try:
+            os.replace(self.spill_path, claimed)
+        except FileNotFoundError:
+            return
+
+        rows: List[Dict[str, Any]] = []
+        with open(claimed, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                    row["created_at"] = datetime.fromisoformat(row["created_at"])
+                except (ValueError, KeyError, TypeError) as e:
+                    # A torn last line from a crash mid-write; keep the rest.
+                    logger.error(f"DVI write-behind skipped spill line {line_no} ({e}): {line.strip()}")
+                    continue
+                rows.append(row)
+        with self._lock:
+            self._pending[:0] = rows
+        os.remove(claimed)
+        self._replayed_rows += len(rows)
+        logger.info(f"DVI write-behind replaying {len(rows)} rows from {self.spill_path}")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    # ---------- producer side ----------
+
+    def allocate_id(self) -> int:
+        with self._id_lock:
+            if not self._ids:
+                self._ids.extend(self._reserve_ids(self.id_block_size))
+            return self._ids.popleft()
+
+    def _reserve_ids(self, n: int) -> List[int]:
+        with self.session_factory() as db:
+            rows = db.execute(
+                text(f"SELECT nextval('{ID_SEQUENCE}') FROM generate_series(1, :n)"),
+                {"n": n},
+            )
+            return [r[0] for r in rows]
+
+    def submit(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a row for insertion. `id` and `created_at` are filled in here so
+        the returned dict matches what will end up in the table.
+        """
+        if self._thread is None:
+            self.start()
+
+        # Claim the slot under the same lock as the check, so concurrent
+        # callers waiting on allocate_id() cannot overshoot max_pending.
+        with self._lock:
+            if len(self._pending) + self._in_flight + self._reserved >= self.max_pending:
+                self._rejected_submits += 1
+                self._wakeup.set()
+                raise WriteBehindFull(f"{self.max_pending} DVI rows already pending")
+            self._reserved += 1
+
+        try:
+            row = dict(row)
+            if "id" not in row:
+                row["id"] = self.allocate_id()
+            row.setdefault("created_at", datetime.now(timezone.utc))
+        except Exception:
+            with self._lock:
+                self._reserved -= 1
+            raise
+
+        with self._lock:
+            self._reserved -= 1
+            self._pending.append(row)
+            depth = len(self._pending)
+
+        if depth >= self.batch_size:
+            self._wakeup.set()
+        return row
+
+    # ---------- consumer side ----------
+
+    def flush(self) -> bool:
+        """Write all pending rows in one transaction. Returns False on failure."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._in_flight = len(batch)
+            if not batch:
+                return True
+
+            start = time.perf_counter()
+            try:
+                written = self._insert(batch)
+            except Exception as e:
+                with self._lock:
+                    # Put the batch back in front so ordering and durability are kept.
+                    self._pending[:0] = batch
+                    self._in_flight = 0
+                self._failed_flushes += 1
+                logger.error(f"DVI write-behind flush of {len(batch)} rows failed: {e}")
+                return False
+            with self._lock:
+                self._in_flight = 0
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._flush_count += 1
+            self._flushed_rows += written
+            self._last_flush_ms = elapsed_ms
+            self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+            self._total_flush_ms += elapsed_ms
+            logger.debug(f"DVI write-behind flushed {len(batch)} rows in {elapsed_ms:.1f}ms")
+            return True
+
+    def _insert(self, batch: List[Dict[str, Any]]) -> int:
+        """
+        Insert `batch` in one statement. If the database rejects the data,
+        fall back to one insert per row so a single bad row cannot block the
+        rest of the batch. Returns the number of rows written.
+        """
+        try:
+            with self.session_factory() as db:
+                db.execute(insert(DVIRecord), batch)
+                db.commit()
+            return len(batch)
+        except (IntegrityError, DataError) as e:
+            logger.warning(f"DVI write-behind batch of {len(batch)} rejected ({e.orig}), retrying row by row")
+
+        written = 0
+        failed: List[Dict[str, Any]] = []
+        for i, row in enumerate(batch):
+            try:
+                with self.session_factory() as db:
+                    db.execute(insert(DVIRecord), [row])
+                    db.commit()
+                written += 1
+            except (IntegrityError, DataError) as e:
+                # A duplicate id here usually means an earlier ambiguous commit
+                # did store the row; it is dead-lettered for inspection anyway.
+                failed.append({**row, "error": str(e.orig)})
+            except Exception as e:
+                # Anything else is not the row's fault: requeue what is left.
+                logger.error(f"DVI write-behind row-by-row retry interrupted: {e}")
+                with self._lock:
+                    self._pending[:0] = batch[i:]
+                break
+        self._dead_letter(failed, "rejected by the database")
+        return written
+
+    def _dead_letter(self, rows: List[Dict[str, Any]], reason: str) -> None:
+        if not rows:
+            return
+        self._dropped_rows += len(rows)
+        self._dead_letters.extend(rows)
+        for row in rows:
+            logger.error(f"DVI write-behind dropped row ({reason}): {row}")
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        return list(self._dead_letters)
+
+    # ---------- telemetry ----------
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        avg_ms = self._total_flush_ms / self._flush_count if self._flush_count else 0.0
+        return {
+            "enabled": True,
+            "running": bool(self._thread and self._thread.is_alive()),
+            "queue_depth": self.queue_depth(),
+            "flushes": self._flush_count,
+            "failed_flushes": self._failed_flushes,
+            "flushed_rows": self._flushed_rows,
+            "rejected_submits": self._rejected_submits,
+            "dropped_rows": self._dropped_rows,
+            "spilled_rows": self._spilled_rows,
+            "replayed_rows": self._replayed_rows,
+            "max_pending": self.max_pending,
+            "last_flush_ms": round(self._last_flush_ms, 2),
+            "avg_flush_ms": round(avg_ms, 2),
+            "max_flush_ms": round(self._max_flush_ms, 2),
+        }
+
+
+def _build_writer() -> Optional[DVIWriteBehind]:
+    if not settings.dvi_write_behind:
+        return None
+    if engine.dialect.name != "postgresql":
+        logger.warning(
+            "DVI_WRITE_BEHIND needs a PostgreSQL sequence to pre-allocate IDs; "
+            f"falling back to synchronous inserts on {engine.dialect.name}."
+        )
+        return None
+    return DVIWriteBehind(
+        SessionLocal,
+        batch_size=settings.dvi_flush_batch_size,
+        flush_interval=settings.dvi_flush_interval_ms / 1000,
+        max_pending=settings.dvi_max_pending,
+        id_block_size=settings.dvi_id_block_size,
+        spill_path=settings.dvi_spill_path or None,
+    )
+
+
+dvi_writer: Optional[DVIWriteBehind] = _build_writer()
@@ -0,0 +1,241 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, Select, select
+
+from app.core.config import get_settings
+from app.core.logging import get_logger
+from app.db.session import SessionLocal
+from app.models.dvi import DVIRecord
+from app.models.user import User
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+settings = get_settings()
+logger = get_logger("export")
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+DVI_RECORD_COLUMNS = [
+    DVIRecord.id,
+    DVIRecord.user_id,
+    User.email,
+    User.role,
+    User.cohort,
+    DVIRecord.finance_score,
+    DVIRecord.logistics_score,
+    DVIRecord.health_score,
+    DVIRecord.education_score,
+    DVIRecord.wellbeing_score,
+    DVIRecord.overall_score,
+    DVIRecord.level,
+    DVIRecord.scoring_model,
+    DVIRecord.created_at,
+]
+
+USER_COLUMNS = [
+    User.id,
+    User.email,
+    User.full_name,
+    User.role,
+    User.cohort,
+    User.is_active,
+    User.created_at,
+]
+
+
+def _apply_filters(
+    stmt: Select,
+    created_at,
+    role: Optional[str],
+    cohort: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> Select:
+    if role:
+        stmt = stmt.where(User.role == role)
+    if cohort:
+        stmt = stmt.where(User.cohort == cohort)
+    if start:
+        stmt = stmt.where(created_at >= start)
+    if end:
+        stmt = stmt.where(created_at < end)
+    return stmt
+
+
+def dvi_records_query(
+    role: Optional[str] = None,
+    cohort: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    stmt = select(*DVI_RECORD_COLUMNS).join(User, User.id == DVIRecord.user_id)
+    stmt = _apply_filters(stmt, DVIRecord.created_at, role, cohort, start, end)
+    return stmt.order_by(DVIRecord.id)
+
+
+def users_query(
+    role: Optional[str] = None,
+    cohort: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Select:
+    stmt = select(*USER_COLUMNS)
+    stmt = _apply_filters(stmt, User.created_at, role, cohort, start, end)
+    return stmt.order_by(User.id)
+
+
+# ---------- ROW STREAMING ----------
+
+def _stream_chunks(stmt: Select, chunk_size: int) -> Iterator[Sequence[Any]]:
+    """
+    Yield result rows in chunks from a server-side cursor. The export owns its
+    session because the response body is produced after the request's
+    dependency-scoped session has been closed.
+    """
+    with SessionLocal() as db:
+        result = db.execute(stmt.execution_options(yield_per=chunk_size))
+        for chunk in result.partitions():
+            yield chunk
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(header: List[str], chunks: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    for chunk in chunks:
+        writer.writerows([[_jsonable(v) for v in row] for row in chunk])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate(0)
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(header: List[str], chunks: Iterator[Sequence[Any]]) -> Iterator[bytes]:
+    for chunk in chunks:
+        lines = [
+            json.dumps({k: _jsonable(v) for k, v in zip(header, row)}, ensure_ascii=False)
+            for row in chunk
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """
+    Write-only file object for ParquetWriter. Written bytes are handed out by
+    `drain()`, while `tell()` keeps counting from the start of the file so the
+    offsets in the parquet footer stay correct.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._parts: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _arrow_type(sql_type):
+    if isinstance(sql_type, Boolean):
+        return pa.bool_()
+    if isinstance(sql_type, Integer):
+        return pa.int64()
+    if isinstance(sql_type, Float):
+        return pa.float64()
+    if isinstance(sql_type, DateTime):
+        return pa.timestamp("us", tz="UTC" if sql_type.timezone else None)
+    return pa.string()
+
+
+def parquet_schema(stmt: Select):
+    """
+    Arrow schema derived from the SQL column types. Inferring it from the data
+    would type an all-NULL first chunk as `null` and break later chunks.
+    """
+    return pa.schema([(c.key, _arrow_type(c.type)) for c in stmt.selected_columns])
+
+
+def _parquet_chunks(
+    schema,
+    chunks: Iterator[Sequence[Any]],
+    compression: str,
+) -> Iterator[bytes]:
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    header = schema.names
+    for chunk in chunks:
+        table = pa.Table.from_pylist([dict(zip(header, row)) for row in chunk], schema=schema)
+        # One row group per chunk, so each chunk can be sent as soon as it is written.
+        writer.write_table(table)
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _gzip(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 → gzip container
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def stream_export(
+    stmt: Select,
+    fmt: str,
+    gzip: bool = False,
+    chunk_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    Encode the rows of `stmt` as `fmt`, holding at most one chunk in memory.
+
+    For CSV and NDJSON `gzip` wraps the byte stream; parquet compresses its
+    column chunks internally instead (gzip codec if requested, snappy otherwise).
+    """
+    chunk_size = chunk_size or settings.export_chunk_size
+    header = [c.key for c in stmt.selected_columns]
+    chunks = _stream_chunks(stmt, chunk_size)
+
+    if fmt == "parquet":
+        if pa is None:
+            raise RuntimeError("pyarrow is not installed; parquet export is unavailable.")
+        return _parquet_chunks(parquet_schema(stmt), chunks, "gzip" if gzip else "snappy")
+
+    body = _csv_chunks(header, chunks) if fmt == "csv" else _ndjson_chunks(header, chunks)
+    return _gzip(body) if gzip else body
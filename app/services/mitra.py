@@ -13,12 +13,13 @@ logger = get_logger("mitra")
 client = OpenAI(api_key=settings.openai_api_key)
 
 def build_user_context(user: User, db: Session) -> str:
-    last_dvi = (
+    latest = (
         db.query(DVIRecord)
         .filter(DVIRecord.user_id == user.id)
         .order_by(DVIRecord.created_at.desc())
-        .first()
     )
+    # Look in the recent partitions first; only inactive users fall through to a full scan.
+    last_dvi = latest.filter(DVIRecord.created_within(settings.dvi_recent_days)).first() or latest.first()
 
     dvi_summary = "No DVI data yet."
     if last_dvi:
@@ -0,0 +1,4 @@
+import os
+
+# app.db.session builds its engine at import time; give tests a throwaway database.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,31 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+
+from app.db.instrumentation import instrument_engine
+
+
+def test_integrity_error_is_not_masked_by_instrumentation():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    instrument_engine(engine, slow_query_ms=500, statement_timeout_ms=0)
+
+    metadata = MetaData()
+    users = Table(
+        "users",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("email", String, unique=True, nullable=False),
+    )
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(insert(users).values(email="a@example.com"))
+
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(insert(users).values(email="a@example.com"))
+
+    # The connection is still usable after the failed statement.
+    with engine.connect() as conn:
+        assert conn.scalar(select(users.c.email)) == "a@example.com"
@@ -0,0 +1,124 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.session import Base
+from app.models.dvi import DVIRecord
+from app.models.user import User  # noqa: F401  (registers users for the foreign key)
+from app.services.dvi_writer import DVIWriteBehind, WriteBehindFull
+
+
+def _row(record_id: int) -> dict:
+    return {
+        "id": record_id,
+        "user_id": 1,
+        "finance_score": 50.0,
+        "logistics_score": 50.0,
+        "health_score": 50.0,
+        "education_score": 50.0,
+        "wellbeing_score": 50.0,
+        "overall_score": 50.0,
+        "level": "Moderate",
+        "scoring_model": "record-v1",
+        "created_at": datetime(2024, 1, record_id, tzinfo=timezone.utc),
+    }
+
+
+class _Unreachable:
+    def __call__(self):
+        raise OperationalError("connect", {}, Exception("database is down"))
+
+
+def test_unflushed_rows_are_spilled_and_replayed(tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+
+    down = DVIWriteBehind(_Unreachable(), flush_interval=60, spill_path=spill_path)
+    for record_id in (1, 2, 3):
+        down.submit(_row(record_id))
+    down.shutdown()
+    assert down.stats()["spilled_rows"] == 3
+    assert down.dead_letters() == []
+
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    up = DVIWriteBehind(sessionmaker(bind=engine), flush_interval=60, spill_path=spill_path)
+    up.start()
+    assert up.queue_depth() == 3
+    up.shutdown()
+
+    with engine.connect() as conn:
+        assert conn.scalars(select(DVIRecord.id).order_by(DVIRecord.id)).all() == [1, 2, 3]
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert list(tmp_path.iterdir()) == []
+
+
+class _SlowIds(DVIWriteBehind):
+    """Hands out ids slowly, the way a round trip to the sequence would."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._next_id = 0
+        self.fail_next = False
+
+    def _reserve_ids(self, n):
+        time.sleep(0.01)
+        if self.fail_next:
+            self.fail_next = False
+            raise OperationalError("nextval", {}, Exception("database is down"))
+        self._next_id += n
+        return list(range(self._next_id - n + 1, self._next_id + 1))
+
+
+def _sqlite_writer(**kwargs) -> _SlowIds:
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    Base.metadata.create_all(engine)
+    return _SlowIds(sessionmaker(bind=engine), flush_interval=60, id_block_size=1, **kwargs)
+
+
+def test_concurrent_submits_do_not_exceed_max_pending():
+    writer = _sqlite_writer(max_pending=5)
+    writer.start()
+    accepted, rejected = [], []
+    barrier = threading.Barrier(20)
+
+    def submit(n):
+        row = {k: v for k, v in _row(1).items() if k != "id"}
+        barrier.wait()
+        try:
+            accepted.append(writer.submit(row))
+        except WriteBehindFull:
+            rejected.append(n)
+
+    threads = [threading.Thread(target=submit, args=(n,)) for n in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(accepted) == 5
+    assert len(rejected) == 15
+    assert writer.queue_depth() == 5
+    writer.shutdown()
+
+
+def test_failed_id_allocation_releases_its_slot():
+    writer = _sqlite_writer(max_pending=1)
+    writer.start()
+    row = {k: v for k, v in _row(1).items() if k != "id"}
+
+    writer.fail_next = True
+    with pytest.raises(OperationalError):
+        writer.submit(row)
+    assert writer.submit(row)["id"] == 1
+    writer.shutdown()